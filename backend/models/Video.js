@@ -94,6 +94,22 @@ export class Video {
     return data;
   }
 
+  // Replace a summary produced by a cheaper model tier with the full-quality one.
+  // The instructor's edited summary is kept if it differs from the one being replaced.
+  static async applySummaryUpgrade(id, previousSummary, results) {
+    const video = await Video.findById(id);
+    const updates = {
+      transcript: results.transcript,
+      summary: results.summary
+    };
+
+    if (!video.edited_summary || video.edited_summary === previousSummary) {
+      updates.edited_summary = results.summary;
+    }
+
+    return Video.update(id, updates);
+  }
+
   static async updateSummary(id, summary) {
     const { data, error } = await supabase
       .from('videos')
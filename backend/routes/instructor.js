@@ -14,6 +14,7 @@ import { Enrollment } from '../models/Enrollment.js';
 import { StudentVideoProgress } from '../models/StudentVideoProgress.js';
 import { QuizAttempt } from '../models/QuizAttempt.js';
 import { Achievement } from '../models/Achievement.js';
+import { trackVideoJob, videoProcessingParams } from '../utils/videoProcessor.js';
 
 const __filename = fileURLToPath(import.meta.url);
 const __dirname = path.dirname(__filename);
@@ -52,7 +53,7 @@ const materialUpload = multer({
 });
 
 // Background video processing function
-const processVideoInBackground = async (videoId, videoPath) => {
+const processVideoInBackground = async (videoId, videoPath, course) => {
   try {
     const video = await Video.findById(videoId);
     if (!video) {
@@ -74,17 +75,13 @@ const processVideoInBackground = async (videoId, videoPath) => {
       headers: {
         'Content-Type': 'multipart/form-data',
       },
-      timeout: 300000, // 5 minutes timeout
+      params: videoProcessingParams(course),
+      timeout: 300000, // 5 minutes timeout for the upload; processing is polled
     });
 
-    // Update video with AI results
-    await Video.updateStatus(videoId, 'completed', {
-      transcript: response.data.transcript,
-      summary: response.data.summary,
-      processing_time: response.data.processing_time
-    });
-
-    console.log(`Video ${videoId} processed successfully`);
+    // The Python server queues the video and answers right away with the job id
+    trackVideoJob(videoId, response.data.job_id, 'error');
+    console.log(`Video ${videoId} queued for AI processing (job ${response.data.job_id})`);
 
     // Clean up uploaded file
     await fs.unlink(videoPath);
@@ -348,7 +345,7 @@ router.post('/courses/:courseId/videos', videoUpload.single('video'), async (req
     });
 
     // Process video with AI in background
-    processVideoInBackground(video.id, req.file.path);
+    processVideoInBackground(video.id, req.file.path, course);
 
     res.status(201).json({
       success: true,
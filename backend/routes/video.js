@@ -47,7 +47,7 @@ router.post('/process', authenticate, uploadFields, async (req, res) => {
     });
 
     // Process with AI in background
-    processVideoWithAI(video.id, uploadResult.publicUrl);
+    processVideoWithAI(video.id, uploadResult.publicUrl, course);
 
     res.json({
       success: true,
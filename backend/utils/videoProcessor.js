@@ -1,7 +1,20 @@
 import axios from 'axios';
 
+const PRIORITY_HIGH = 0;
+const PRIORITY_NORMAL = 1;
+const PUBLISHED_COURSE_DEADLINE = 30 * 60; // seconds
+
+// Scheduling hints for the Python server: students of a published course are waiting
+// for the summary, while a draft course can be summarized whenever there is capacity
+export function videoProcessingParams(course) {
+  if (course?.is_published) {
+    return { priority: PRIORITY_HIGH, deadline_seconds: PUBLISHED_COURSE_DEADLINE };
+  }
+  return { priority: PRIORITY_NORMAL };
+}
+
 export class VideoProcessor {
-  static async processVideo(videoId, videoUrl) {
+  static async processVideo(videoId, videoUrl, course = null) {
     try {
       console.log(`Starting AI processing for video ${videoId} at ${videoUrl}`);
 
@@ -34,25 +47,19 @@ export class VideoProcessor {
         headers: {
           ...formData.getHeaders()
         },
+        params: videoProcessingParams(course),
         maxContentLength: Infinity,
         maxBodyLength: Infinity,
-        timeout: 600000 // 10 minutes timeout for processing
+        timeout: 300000 // 5 minutes timeout for the upload; processing is polled below
       });
 
       console.log('Python server response:', pythonResponse.data);
 
-      const { summary, transcript, processing_time } = pythonResponse.data;
+      // The Python server queues the video and answers right away; the results
+      // are picked up by polling the job
+      trackVideoJob(videoId, pythonResponse.data.job_id, 'failed');
 
-      // Update video record with results
-      const { Video } = await import('../models/Video.js');
-      await Video.updateStatus(videoId, 'completed', {
-        transcript,
-        summary,
-        processingTime: processing_time
-      });
-
-      console.log(`Video ${videoId} processing completed successfully`);
-      return { success: true, summary, transcript };
+      return { success: true, jobId: pythonResponse.data.job_id };
 
     } catch (error) {
       console.error(`Error processing video ${videoId}:`, error);
@@ -67,9 +74,83 @@ export class VideoProcessor {
   }
 }
 
-export async function processVideoWithAI(videoId, videoUrl) {
+export async function processVideoWithAI(videoId, videoUrl, course = null) {
   // Run in background
   setImmediate(() => {
-    VideoProcessor.processVideo(videoId, videoUrl).catch(console.error);
+    VideoProcessor.processVideo(videoId, videoUrl, course).catch(console.error);
   });
 }
+
+const JOB_POLL_INTERVAL = 15 * 1000; // 15 seconds while waiting for the first result
+const UPGRADE_POLL_INTERVAL = 60 * 1000; // 1 minute while waiting for a summary upgrade
+const JOB_MAX_WAIT = 24 * 60 * 60 * 1000; // 24 hours
+
+// Poll a video job on the Python server. The first result is stored as soon as it is
+// ready; under load it comes from a cheaper model tier, in which case the server
+// re-processes the video at full quality later and the upgraded summary replaces it.
+export function trackVideoJob(videoId, jobId, failedStatus = 'failed') {
+  const PYTHON_SERVER_URL = process.env.PYTHON_SERVER_URL || 'http://localhost:8000';
+  const startedAt = Date.now();
+  let firstResult = null;
+
+  const markFailed = async (reason) => {
+    console.error(`Video ${videoId} processing failed: ${reason}`);
+    const { Video } = await import('../models/Video.js');
+    await Video.updateStatus(videoId, failedStatus);
+  };
+
+  const poll = async () => {
+    try {
+      const { data } = await axios.get(`${PYTHON_SERVER_URL}/jobs/${jobId}`);
+      const { Video } = await import('../models/Video.js');
+
+      if (!firstResult) {
+        if (data.status === 'failed') {
+          return markFailed(data.error);
+        }
+
+        if (data.status === 'completed') {
+          await Video.updateStatus(videoId, 'completed', {
+            transcript: data.transcript,
+            summary: data.summary,
+            processingTime: data.processing_time
+          });
+          console.log(`Video ${videoId} processing completed successfully (tier '${data.tier}')`);
+
+          if (!data.upgrade_pending) {
+            return;
+          }
+          firstResult = data;
+        }
+      } else if (data.status === 'completed' && data.tier !== firstResult.tier) {
+        await Video.applySummaryUpgrade(videoId, firstResult.summary, {
+          transcript: data.transcript,
+          summary: data.summary
+        });
+        console.log(`Video ${videoId} summary upgraded to tier '${data.tier}'`);
+        return;
+      } else if (!data.upgrade_pending) {
+        console.log(`Video ${videoId} summary upgrade was dropped, keeping tier '${firstResult.tier}'`);
+        return;
+      }
+    } catch (error) {
+      if (error.response?.status === 404) {
+        // The Python server lost the job (e.g. it restarted)
+        if (!firstResult) {
+          return markFailed('job no longer exists on the Python server');
+        }
+        console.error(`Upgrade job for video ${videoId} no longer exists on the Python server`);
+        return;
+      }
+      console.error(`Error checking video job for video ${videoId}:`, error.message);
+    }
+
+    if (Date.now() - startedAt < JOB_MAX_WAIT) {
+      setTimeout(poll, firstResult ? UPGRADE_POLL_INTERVAL : JOB_POLL_INTERVAL);
+    } else if (!firstResult) {
+      await markFailed('timed out waiting for the Python server');
+    }
+  };
+
+  setTimeout(poll, JOB_POLL_INTERVAL);
+}
@@ -1,13 +1,17 @@
 from fastapi import FastAPI, UploadFile, File, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-import uvicorn
+from fastapi.responses import JSONResponse
 import os
 import tempfile
 import aiofiles
+import asyncio
+import time
+import uuid
+import re
 from datetime import datetime
 import traceback
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import httpx
 
 # Setup logging
@@ -36,8 +40,8 @@ app.add_middleware(
 
 # Import processing functions with error handling
 try:
-    from transcriber import extract_audio, transcribe_audio
-    from summarizer import summarize_text
+    from transcriber import extract_audio, transcribe_audio, probe_duration, get_whisper_model
+    from summarizer import summarize_text, extractive_summarize, get_summarizer
     from recommendation import recommend_courses
     from utils import chunked_summarize
     DEPENDENCIES_LOADED = True
@@ -46,6 +50,150 @@ except ImportError as e:
     logger.error(f"Import error: {e}")
     DEPENDENCIES_LOADED = False
 
+from scheduler import (
+    VideoJob, VideoScheduler, QueueFullError, MODEL_TIERS, TIERS_BY_NAME, PRIORITY_NORMAL,
+    connect_scheduler
+)
+
+# Assumed length when ffprobe can't read the duration
+DEFAULT_VIDEO_DURATION = 600
+
+# Temporary files of video jobs (see process_video); ones older than
+# ORPHAN_MIN_AGE seconds are removed when a scheduler starts
+TEMP_FILE_PATTERN = re.compile(r'^temp_[0-9a-f]{32}_.+$|^temp_audio_[0-9a-f]{32}\.wav$')
+ORPHAN_MIN_AGE = 60
+
+def preload_models():
+    """
+    Load the Whisper and summarization models of every tier up front so requests
+    don't pay the load cost. The multi-worker server calls this before forking so
+    workers share one copy of the weights.
+    """
+    if not DEPENDENCIES_LOADED:
+        return []
+
+    models = []
+    for whisper_size in dict.fromkeys(tier['whisper_model'] for tier in MODEL_TIERS):
+        logger.info(f"Preloading Whisper '{whisper_size}'...")
+        models.append(get_whisper_model(whisper_size))
+    for summarizer_model in dict.fromkeys(tier['summarizer'] for tier in MODEL_TIERS):
+        if summarizer_model != "extractive":
+            logger.info(f"Preloading summarizer '{summarizer_model}'...")
+            models.append(get_summarizer(summarizer_model).model)
+    return models
+
+def run_video_job(job: VideoJob, tier: str) -> Dict[str, Any]:
+    """Transcribe and summarize one scheduled video with the given model tier"""
+    tier_config = TIERS_BY_NAME[tier]
+    video_path = job.payload['video_path']
+    audio_path = job.payload['audio_path']
+    start_time = datetime.now()
+
+    # 1. Extract audio (upgrade jobs reuse the audio kept from the first pass)
+    if not os.path.exists(audio_path):
+        logger.info("Step 1: Extracting audio from video...")
+        if not os.path.exists(video_path):
+            raise Exception("Video file not found after upload")
+
+        extract_audio(video_path, audio_path)
+
+        if not os.path.exists(audio_path):
+            raise Exception("Audio extraction failed")
+        os.remove(video_path)
+
+    # 2. Transcribe audio
+    logger.info(f"Step 2: Transcribing audio with Whisper '{tier_config['whisper_model']}'...")
+    transcript = transcribe_audio(audio_path, model_size=tier_config['whisper_model'])
+    logger.info(f"Transcript length: {len(transcript)} characters")
+
+    if not transcript or len(transcript.strip()) < 10:
+        raise Exception("Transcription failed or too short")
+
+    # 3. Summarize text
+    logger.info(f"Step 3: Generating summary with '{tier_config['summarizer']}'...")
+    if tier_config['summarizer'] == "extractive":
+        final_summary = extractive_summarize(transcript)
+    else:
+        final_summary = chunked_summarize(
+            text=transcript,
+            summarize_func=lambda text: summarize_text(text, model_name=tier_config['summarizer']),
+            max_chunk_size=1500
+        )
+
+    if not final_summary or len(final_summary.strip()) < 10:
+        raise Exception("Summary generation failed")
+
+    processing_time = (datetime.now() - start_time).total_seconds()
+
+    logger.info(f"Processing completed in {processing_time:.2f} seconds (tier '{tier}')")
+
+    return {
+        "success": True,
+        "summary": final_summary,
+        "transcript": transcript,
+        "processing_time": processing_time
+    }
+
+def cleanup_video_job(job: VideoJob):
+    """Remove a job's temporary files once no upgrade needs them"""
+    for path in (job.payload['video_path'], job.payload['audio_path']):
+        if os.path.exists(path):
+            os.remove(path)
+            logger.info(f"Cleaned up: {path}")
+
+def sweep_orphaned_temp_files(directory: str = "."):
+    """
+    Remove temporary files left behind by jobs of a previous scheduler, which
+    was restarted or killed with them queued or running. Recent files are kept
+    since they may be uploads still being written.
+    """
+    cutoff = time.time() - ORPHAN_MIN_AGE
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        try:
+            if TEMP_FILE_PATTERN.match(name) and os.path.getmtime(path) < cutoff:
+                os.remove(path)
+                logger.info(f"Removed orphaned temporary file: {path}")
+        except OSError as e:
+            logger.error(f"Could not remove orphaned temporary file {path}: {e}")
+
+def create_video_scheduler(workers: int = 1) -> VideoScheduler:
+    """
+    workers is the number of video jobs processed at once: worker threads when
+    started here, forked worker processes under server.py
+    """
+    # A new scheduler starts with an empty queue, so no job owns these anymore
+    sweep_orphaned_temp_files()
+    return VideoScheduler(
+        run_video_job,
+        workers=workers,
+        max_backlog=float(os.getenv('MAX_BACKLOG_SECONDS', 7200)),
+        cleanup_func=cleanup_video_job
+    )
+
+# Set on startup: a local scheduler, or a proxy to the one shared by all server.py workers
+video_scheduler = None
+
+@app.on_event("startup")
+async def start_scheduler():
+    global video_scheduler
+    address = os.getenv('SCHEDULER_ADDRESS')
+    if address:
+        video_scheduler = await asyncio.to_thread(
+            connect_scheduler, address, bytes.fromhex(os.environ['SCHEDULER_AUTHKEY'])
+        )
+        logger.info(f"Connected to shared video scheduler at {address}")
+    else:
+        # Not started by server.py, so nothing has preloaded the models yet. One
+        # worker thread: jobs on the same model would only queue on its lock
+        try:
+            await asyncio.to_thread(preload_models)
+        except Exception as e:
+            # Keep /health and /recommend-courses up; video jobs load models on first use
+            logger.error(f"Model preload failed: {e}")
+        video_scheduler = create_video_scheduler(workers=1)
+        video_scheduler.start()
+
 @app.get("/")
 async def root():
     return {"message": "Video Summarizer API", "status": "running"}
@@ -56,11 +204,16 @@ async def health_check():
     return {
         "status": status,
         "service": "python-video-processor",
-        "dependencies_loaded": DEPENDENCIES_LOADED
+        "dependencies_loaded": DEPENDENCIES_LOADED,
+        "scheduler": await asyncio.to_thread(video_scheduler.stats) if video_scheduler else None
     }
 
 @app.post("/process-video")
-async def process_video(video: UploadFile = File(...)):
+async def process_video(
+    video: UploadFile = File(...),
+    priority: int = Query(PRIORITY_NORMAL, ge=0, le=2, description="0 = high, 1 = normal, 2 = low"),
+    deadline_seconds: Optional[float] = Query(None, description="Seconds from now the summary is wanted by")
+):
     if not DEPENDENCIES_LOADED:
         raise HTTPException(
             status_code=500,
@@ -68,7 +221,7 @@ async def process_video(video: UploadFile = File(...)):
         )
 
     temp_video_path = None
-    audio_path = "temp_audio.wav"
+    submitted = False
 
     try:
         # Validate file type
@@ -80,8 +233,10 @@ async def process_video(video: UploadFile = File(...)):
                 detail=f"Invalid video format. Allowed: {', '.join(allowed_extensions)}"
             )
 
-        # Create temporary file
-        temp_video_path = f"temp_{video.filename}"
+        # Create temporary files, unique per job since jobs run concurrently
+        job_id = uuid.uuid4().hex
+        temp_video_path = f"temp_{job_id}_{video.filename}"
+        audio_path = f"temp_audio_{job_id}.wav"
 
         # Save uploaded file
         logger.info(f"Saving uploaded file: {video.filename}")
@@ -89,47 +244,34 @@ async def process_video(video: UploadFile = File(...)):
             content = await video.read()
             await out_file.write(content)
 
-        start_time = datetime.now()
-
-        # 1. Extract audio
-        logger.info("Step 1: Extracting audio from video...")
-        if not os.path.exists(temp_video_path):
-            raise HTTPException(status_code=500, detail="Video file not found after upload")
-
-        extract_audio(temp_video_path, audio_path)
-
-        if not os.path.exists(audio_path):
-            raise HTTPException(status_code=500, detail="Audio extraction failed")
-
-        # 2. Transcribe audio
-        logger.info("Step 2: Transcribing audio...")
-        transcript = transcribe_audio(audio_path, model_size="base")
-        logger.info(f"Transcript length: {len(transcript)} characters")
-
-        if not transcript or len(transcript.strip()) < 10:
-            raise HTTPException(status_code=500, detail="Transcription failed or too short")
-
-        # 3. Summarize text with chunking
-        logger.info("Step 3: Generating summary...")
-        final_summary = chunked_summarize(
-            text=transcript,
-            summarize_func=lambda text: summarize_text(text, model_name="facebook/bart-large-cnn"),
-            max_chunk_size=1500
+        # Estimate the processing cost from the duration before decoding anything
+        try:
+            duration = await asyncio.to_thread(probe_duration, temp_video_path)
+        except Exception as probe_error:
+            logger.warning(f"Could not read video duration: {probe_error}")
+            duration = DEFAULT_VIDEO_DURATION
+
+        job = VideoJob(
+            duration=duration,
+            priority=priority,
+            deadline=time.time() + deadline_seconds if deadline_seconds is not None else None,
+            payload={'video_path': temp_video_path, 'audio_path': audio_path},
+            job_id=job_id
+        )
+        await asyncio.to_thread(video_scheduler.submit, job)
+        # The scheduler owns the temporary files from here on
+        submitted = True
+
+        # Processing can take longer than any client timeout, so the result is
+        # fetched from /jobs/{job_id} instead of waiting on this request
+        return JSONResponse(
+            status_code=202,
+            content={"success": True, "job_id": job_id, "status": "queued"}
         )
 
-        if not final_summary or len(final_summary.strip()) < 10:
-            raise HTTPException(status_code=500, detail="Summary generation failed")
-
-        processing_time = (datetime.now() - start_time).total_seconds()
-
-        logger.info(f"Processing completed in {processing_time:.2f} seconds")
-
-        return {
-            "success": True,
-            "summary": final_summary,
-            "transcript": transcript,
-            "processing_time": processing_time
-        }
+    except QueueFullError as e:
+        logger.warning(f"Rejected video: {e}")
+        raise HTTPException(status_code=503, detail=str(e))
 
     except Exception as e:
         logger.error(f"Error processing video: {str(e)}")
@@ -142,15 +284,23 @@ async def process_video(video: UploadFile = File(...)):
     finally:
         # Cleanup temporary files
         try:
-            if temp_video_path and os.path.exists(temp_video_path):
+            if not submitted and temp_video_path and os.path.exists(temp_video_path):
                 os.remove(temp_video_path)
                 logger.info(f"Cleaned up: {temp_video_path}")
-            if os.path.exists(audio_path):
-                os.remove(audio_path)
-                logger.info(f"Cleaned up: {audio_path}")
         except Exception as cleanup_error:
             logger.error(f"Cleanup error: {cleanup_error}")
 
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """
+    Latest result of a video job, including the full-quality result once a job
+    processed with a cheaper tier under load has been upgraded
+    """
+    result = await asyncio.to_thread(video_scheduler.job_status, job_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return result
+
 @app.post("/recommend-courses")
 async def get_course_recommendations(
     enrolled_courses: List[Dict[str, Any]],
@@ -198,10 +348,6 @@ if __name__ == "__main__":
         logger.error("CRITICAL: AI dependencies not loaded. Video processing will not work!")
         logger.error("Please check that whisper-openai, transformers, and torch are installed.")
 
-    port = int(os.environ.get("PORT", 10000))
-    uvicorn.run(
-        "app:app",
-        host="0.0.0.0",
-        port=port,
-        reload=False
-    )
+    # Preloads the models and forks $WORKERS uvicorn workers that share them
+    from server import main
+    main()
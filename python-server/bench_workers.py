@@ -0,0 +1,227 @@
+"""
+Compare memory and throughput of the shared-model server against N independent workers.
+
+    shared:      one `server.py --workers N` (models preloaded once, workers forked):
+                 N HTTP workers and N video workers sharing one scheduler
+    independent: N plain `uvicorn app:app` processes, each loading its own models,
+                 with requests spread over them round-robin; each runs its own
+                 scheduler with one video worker thread
+Both setups therefore serve N requests and process N videos at a time.
+
+For every process of each setup the script reports RSS and PSS (proportional
+set size, which splits shared pages between the processes using them, so the
+PSS column sums to the real memory use). Memory is read after the load run, so
+pages copied during inference are included. Throughput is measured by firing
+requests at /recommend-courses, or at /process-video when --video is given
+(a video request counts as done once /jobs/{job_id} reports its result).
+
+With --output the raw numbers (per-process memory, throughput, latencies and
+the settings used) are also written to a JSON file, e.g. to attach to a PR.
+
+Linux only (reads /proc). Example:
+    python bench_workers.py --workers 4 --requests 400 --concurrency 16 --output bench.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+import httpx
+
+CATEGORIES = ['web development', 'python', 'data science', 'devops', 'cybersecurity', 'aiml']
+
+def _read_proc_kb(path: str, field: str) -> int:
+    try:
+        with open(path) as f:
+            for line in f:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1])
+    except (FileNotFoundError, ProcessLookupError):
+        pass
+    return 0
+
+def _children(pid: int) -> List[int]:
+    children = []
+    for entry in os.listdir('/proc'):
+        if entry.isdigit() and _read_proc_kb(f'/proc/{entry}/status', 'PPid') == pid:
+            children.append(int(entry))
+    return children
+
+def _process_tree(pid: int) -> List[int]:
+    """pid and all of its descendants"""
+    pids = [pid]
+    for child in _children(pid):
+        pids.extend(_process_tree(child))
+    return pids
+
+def _memory(pid: int) -> Dict[str, int]:
+    return {
+        'rss_kb': _read_proc_kb(f'/proc/{pid}/status', 'VmRSS'),
+        'pss_kb': _read_proc_kb(f'/proc/{pid}/smaps_rollup', 'Pss'),
+    }
+
+def _sample_courses(n: int) -> List[Dict]:
+    return [
+        {
+            'id': f'course-{i}',
+            'title': f'Course {i}',
+            'category': CATEGORIES[i % len(CATEGORIES)],
+            'description': f'Hands-on {CATEGORIES[i % len(CATEGORIES)]} course number {i} with projects and quizzes',
+            'enrollment_count': (i * 37) % 500,
+        }
+        for i in range(n)
+    ]
+
+def _start(mode: str, workers: int, port: int) -> List[subprocess.Popen]:
+    server_dir = os.path.dirname(os.path.abspath(__file__))
+    if mode == 'shared':
+        commands = [[sys.executable, 'server.py', '--workers', str(workers), '--video-workers', str(workers),
+                     '--host', '127.0.0.1', '--port', str(port)]]
+    else:
+        # Without server.py each process loads its own models on startup
+        commands = [[sys.executable, '-m', 'uvicorn', 'app:app', '--host', '127.0.0.1', '--port', str(port + i)]
+                    for i in range(workers)]
+    return [subprocess.Popen(cmd, cwd=server_dir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            for cmd in commands]
+
+def _stop(processes: List[subprocess.Popen]):
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+async def _wait_ready(urls: List[str], timeout: float):
+    deadline = time.time() + timeout
+    async with httpx.AsyncClient() as client:
+        for url in urls:
+            while True:
+                try:
+                    if (await client.get(f'{url}/health')).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                if time.time() > deadline:
+                    raise TimeoutError(f'{url} did not become ready within {timeout}s')
+                await asyncio.sleep(1)
+
+async def _wait_for_job(client: httpx.AsyncClient, url: str, job_id: str) -> bool:
+    while True:
+        response = await client.get(f'{url}/jobs/{job_id}')
+        if response.status_code != 200:
+            return False
+        if response.json()['status'] in ('completed', 'failed'):
+            return response.json()['status'] == 'completed'
+        await asyncio.sleep(0.5)
+
+async def _load(urls: List[str], requests: int, concurrency: int, video: str) -> Dict[str, float]:
+    courses = _sample_courses(200)
+    payload = {'enrolled_courses': courses[:3], 'all_courses': courses}
+    video_bytes = open(video, 'rb').read() if video else None
+    queue = asyncio.Queue()
+    for i in range(requests):
+        queue.put_nowait(i)
+    latencies = []
+    failures = 0
+
+    async def worker(client: httpx.AsyncClient):
+        nonlocal failures
+        while not queue.empty():
+            i = queue.get_nowait()
+            url = urls[i % len(urls)]  # round-robin for independent workers
+            start = time.perf_counter()
+            if video_bytes is not None:
+                response = await client.post(f'{url}/process-video',
+                                             files={'video': (os.path.basename(video), video_bytes)})
+                ok = response.status_code == 202 and \
+                    await _wait_for_job(client, url, response.json()['job_id'])
+            else:
+                response = await client.post(f'{url}/recommend-courses', json=payload)
+                ok = response.status_code == 200
+            latencies.append(time.perf_counter() - start)
+            if not ok:
+                failures += 1
+
+    async with httpx.AsyncClient(timeout=None) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'throughput': len(latencies) / elapsed,
+        'p50': latencies[len(latencies) // 2],
+        'p95': latencies[int(len(latencies) * 0.95) - 1] if len(latencies) >= 20 else latencies[-1],
+        'failures': failures,
+    }
+
+def run(mode: str, args) -> Dict:
+    processes = _start(mode, args.workers, args.port)
+    urls = [f'http://127.0.0.1:{args.port}'] if mode == 'shared' else \
+        [f'http://127.0.0.1:{args.port + i}' for i in range(args.workers)]
+    try:
+        asyncio.run(_wait_ready(urls, args.startup_timeout))
+        stats = asyncio.run(_load(urls, args.requests, args.concurrency, args.video))
+
+        # Every process counts: in shared mode the parent (which keeps the original
+        # copy of the models), the forked HTTP and video workers and the scheduler
+        stats['processes'] = {}
+        for process in processes:
+            for pid in _process_tree(process.pid):
+                role = 'parent' if mode == 'shared' and pid == process.pid else 'worker'
+                stats['processes'][pid] = dict(_memory(pid), role=role)
+        stats['total_pss_kb'] = sum(memory['pss_kb'] for memory in stats['processes'].values())
+        return stats
+    finally:
+        _stop(processes)
+
+def _report(mode: str, stats: Dict):
+    print(f'\n== {mode} ==')
+    for pid, memory in stats['processes'].items():
+        print(f"  {memory['role']:6} {pid}: RSS {memory['rss_kb'] / 1024:8.1f} MiB  "
+              f"PSS {memory['pss_kb'] / 1024:8.1f} MiB")
+    if mode == 'shared':
+        print("  (the forked children are the HTTP workers, the video workers and the scheduler)")
+    print(f"  total PSS:   {stats['total_pss_kb'] / 1024:.1f} MiB")
+    print(f"  throughput:  {stats['throughput']:.2f} req/s "
+          f"(p50 {stats['p50'] * 1000:.0f} ms, p95 {stats['p95'] * 1000:.0f} ms, {stats['failures']} failed)")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--port', type=int, default=18000)
+    parser.add_argument('--video', help='Benchmark /process-video with this file instead of /recommend-courses')
+    parser.add_argument('--mode', choices=['shared', 'independent', 'both'], default='both')
+    parser.add_argument('--startup-timeout', type=float, default=600)
+    parser.add_argument('--output', help='Also write the results to this JSON file')
+    args = parser.parse_args()
+
+    modes = ['shared', 'independent'] if args.mode == 'both' else [args.mode]
+    results = {}
+    for mode in modes:
+        results[mode] = run(mode, args)
+        _report(mode, results[mode])
+
+    if len(results) == 2:
+        shared, independent = results['shared'], results['independent']
+        print('\n== shared vs independent ==')
+        print(f"  memory:     {shared['total_pss_kb'] / 1024:.1f} MiB vs {independent['total_pss_kb'] / 1024:.1f} MiB "
+              f"({independent['total_pss_kb'] / max(shared['total_pss_kb'], 1):.2f}x less)")
+        print(f"  throughput: {shared['throughput']:.2f} vs {independent['throughput']:.2f} req/s")
+
+    if args.output:
+        settings = {key: value for key, value in vars(args).items() if key != 'output'}
+        with open(args.output, 'w') as f:
+            json.dump({'settings': settings, 'cpu_count': os.cpu_count(), 'results': results}, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+if __name__ == '__main__':
+    main()
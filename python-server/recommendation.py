@@ -16,6 +16,8 @@ import logging
 from typing import List, Dict, Set, Tuple, Optional
 import time
 import re
+import hashlib
+import multiprocessing
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -30,11 +32,117 @@ except Exception as e:
     logger.error(f"Failed to load sentence transformer model: {e}")
     MODEL_LOADED = False
 
+class SharedEmbeddingCache:
+    """
+    Dict-like course embedding cache stored in shared memory.
+
+    Created in the server parent process before forking workers, so every
+    worker reads and fills the same table instead of embedding the catalogue
+    separately. Course ids are stored as 64-bit hashes in an open-addressing
+    table next to a float32 vector block. Each id may live in one of
+    PROBE_LIMIT slots; when all of them are taken, the least recently written
+    one is evicted, so a full table never drops more than one entry at a time.
+    """
+
+    PROBE_LIMIT = 8
+
+    def __init__(self, dim: int, capacity: int = 8192):
+        ctx = multiprocessing.get_context("fork")
+        self.dim = dim
+        self.capacity = capacity
+        self._lock = ctx.Lock()
+        self._clock = ctx.RawValue('q', 0)
+        self._last_clear = ctx.RawValue('d', time.time())
+        self._raw_keys = ctx.RawArray('q', capacity)
+        self._raw_stamps = ctx.RawArray('q', capacity)
+        self._raw_vectors = ctx.RawArray('f', capacity * dim)
+        self._keys = np.frombuffer(self._raw_keys, dtype=np.int64)
+        self._stamps = np.frombuffer(self._raw_stamps, dtype=np.int64)
+        self._vectors = np.frombuffer(self._raw_vectors, dtype=np.float32).reshape(capacity, dim)
+
+    @staticmethod
+    def _hash(course_id) -> int:
+        digest = hashlib.blake2b(str(course_id).encode(), digest_size=8).digest()
+        return int.from_bytes(digest, 'little', signed=True) or 1  # 0 marks an empty slot
+
+    def _slots(self, key: int) -> List[int]:
+        start = key % self.capacity
+        return [(start + i) % self.capacity for i in range(min(self.PROBE_LIMIT, self.capacity))]
+
+    def _lookup(self, key: int) -> Optional[int]:
+        for slot in self._slots(key):
+            if self._keys[slot] == key:
+                return slot
+            if self._keys[slot] == 0:
+                return None
+        return None
+
+    def get(self, course_id, default=None) -> Optional[np.ndarray]:
+        key = self._hash(course_id)
+        with self._lock:
+            slot = self._lookup(key)
+            if slot is None:
+                return default
+            return self._vectors[slot].copy()
+
+    def __contains__(self, course_id) -> bool:
+        key = self._hash(course_id)
+        with self._lock:
+            return self._lookup(key) is not None
+
+    def __getitem__(self, course_id) -> np.ndarray:
+        embedding = self.get(course_id)
+        if embedding is None:
+            raise KeyError(course_id)
+        return embedding
+
+    def __setitem__(self, course_id, embedding: np.ndarray):
+        key = self._hash(course_id)
+        with self._lock:
+            slots = self._slots(key)
+            target = next((slot for slot in slots if self._keys[slot] in (key, 0)), None)
+            if target is None:
+                target = min(slots, key=lambda slot: self._stamps[slot])
+            self._vectors[target] = embedding
+            self._keys[target] = key
+            self._clock.value += 1
+            self._stamps[target] = self._clock.value
+
+    def __len__(self) -> int:
+        with self._lock:
+            return int(np.count_nonzero(self._keys))
+
+    def clear(self):
+        with self._lock:
+            self._keys[:] = 0
+            self._last_clear.value = time.time()
+
+    def clear_if_expired(self, ttl: float) -> bool:
+        """Clear the table if ttl seconds have passed since the last clear in any process"""
+        with self._lock:
+            if time.time() - self._last_clear.value <= ttl:
+                return False
+            self._keys[:] = 0
+            self._last_clear.value = time.time()
+            return True
+
 # Embedding cache for performance
 embedding_cache = {}
 last_cache_clear = time.time()
 CACHE_TTL = 3600  # Clear cache every hour
 
+def enable_shared_embedding_cache(capacity: int = 8192):
+    """
+    Replace the per-process embedding cache with a shared-memory one.
+    Must be called in the parent process before worker processes are forked.
+    """
+    global embedding_cache
+    if not MODEL_LOADED:
+        raise Exception("AI model not loaded")
+
+    embedding_cache = SharedEmbeddingCache(model.get_sentence_embedding_dimension(), capacity)
+    logger.info(f"Shared embedding cache enabled (capacity {capacity})")
+
 # Configurable weights for scoring
 SCORING_WEIGHTS = {
     'semantic_similarity': 0.5,
@@ -100,6 +208,12 @@ def normalize_category_name(category: str) -> str:
 def _clear_old_cache():
     """Clear cache if TTL has expired"""
     global last_cache_clear
+    if isinstance(embedding_cache, SharedEmbeddingCache):
+        # The timestamp lives in shared memory so workers don't clear it on separate schedules
+        if embedding_cache.clear_if_expired(CACHE_TTL):
+            logger.info("Embedding cache cleared")
+        return
+
     current_time = time.time()
     if current_time - last_cache_clear > CACHE_TTL:
         embedding_cache.clear()
@@ -113,15 +227,18 @@ def get_course_embeddings_batch(courses: List[Dict]) -> Dict[str, np.ndarray]:
     
     _clear_old_cache()
     
-    # Find courses that need embedding
+    # Read cached embeddings once; the shared cache may evict entries at any time,
+    # so the result is built from what was read here and what is computed below
+    result = {}
     courses_to_embed = []
-    course_ids_to_embed = []
     
     for course in courses:
         course_id = course['id']
-        if course_id not in embedding_cache:
+        cached = embedding_cache.get(course_id)
+        if cached is not None:
+            result[course_id] = cached
+        elif course_id not in result:
             courses_to_embed.append(course)
-            course_ids_to_embed.append(course_id)
     
     # Generate embeddings for new courses
     if courses_to_embed:
@@ -132,15 +249,9 @@ def get_course_embeddings_batch(courses: List[Dict]) -> Dict[str, np.ndarray]:
         embeddings = model.encode(descriptions)
         
         # Cache the new embeddings
-        for course_id, embedding in zip(course_ids_to_embed, embeddings):
-            embedding_cache[course_id] = embedding
-    
-    # Return all requested embeddings
-    result = {}
-    for course in courses:
-        course_id = course['id']
-        if course_id in embedding_cache:
-            result[course_id] = embedding_cache[course_id]
+        for course, embedding in zip(courses_to_embed, embeddings):
+            embedding_cache[course['id']] = embedding
+            result[course['id']] = embedding
     
     return result
 
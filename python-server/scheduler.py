@@ -0,0 +1,389 @@
+"""
+Priority and deadline-aware scheduling for video processing jobs.
+
+Jobs are ordered by priority class, then deadline, then estimated cost (from the
+video duration reported by ffprobe), so a short clip doesn't wait behind a long
+recording. While the queue is backed up, jobs are processed with cheaper model
+tiers; every job that got a degraded result is queued again for an upgrade to
+the full tier, and those upgrades run once the regular queue is empty.
+
+JobQueue holds the policy and is driven with an explicit clock so the same
+code runs in the server (VideoScheduler) and in simulate_schedule.py.
+"""
+import logging
+import math
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from multiprocessing.managers import BaseManager
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Model tiers from best to cheapest. cost_per_second is the processing time per
+# second of audio on one CPU worker; rough figures used for ordering and load estimates.
+MODEL_TIERS = [
+    {'name': 'full', 'whisper_model': 'base', 'summarizer': 'facebook/bart-large-cnn', 'cost_per_second': 0.6},
+    {'name': 'reduced', 'whisper_model': 'base', 'summarizer': 'sshleifer/distilbart-cnn-12-6', 'cost_per_second': 0.45},
+    {'name': 'economy', 'whisper_model': 'tiny', 'summarizer': 'extractive', 'cost_per_second': 0.15},
+]
+TIERS_BY_NAME = {tier['name']: tier for tier in MODEL_TIERS}
+FULL_TIER = MODEL_TIERS[0]['name']
+
+JOB_OVERHEAD = 5.0  # Seconds per job for audio extraction and setup
+
+# Queued full-tier work (seconds per worker) above which a cheaper tier is used
+LOAD_THRESHOLDS = {
+    'reduced': 600,
+    'economy': 1800,
+}
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+
+AGING_INTERVAL = 900  # A waiting job moves up one priority class every 15 minutes
+
+class QueueFullError(Exception):
+    """Raised when a job would push the queued work past the backlog limit"""
+    pass
+
+@dataclass
+class VideoJob:
+    duration: float  # Video length in seconds
+    priority: int = PRIORITY_NORMAL
+    deadline: Optional[float] = None  # Absolute time the result is wanted by
+    payload: Dict[str, Any] = field(default_factory=dict)
+    job_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    upgrade_of: Optional[str] = None  # Id of the job whose degraded result this one replaces
+    submitted_at: float = 0.0
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    tier: Optional[str] = None
+
+def estimate_cost(duration: float, tier: str = FULL_TIER) -> float:
+    """Estimated processing seconds for a video of the given duration"""
+    return JOB_OVERHEAD + duration * TIERS_BY_NAME[tier]['cost_per_second']
+
+class JobQueue:
+    """
+    Scheduling policy: job ordering, tier selection, admission and upgrades.
+    Not thread-safe; every method takes the current time explicitly.
+    """
+
+    def __init__(self, workers: int = 1, max_backlog: Optional[float] = None,
+                 upgrades: bool = True, max_upgrades: int = 100):
+        self.workers = workers
+        self.max_backlog = max_backlog  # Seconds of full-tier work per worker
+        self.upgrades_enabled = upgrades
+        self.max_upgrades = max_upgrades
+        self._jobs: List[VideoJob] = []
+        self._upgrades = deque()
+        self._backlog = 0.0  # Queued full-tier work in seconds, over all workers
+        self._sequence = 0
+        self._order: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    @property
+    def pending_upgrades(self) -> int:
+        return len(self._upgrades)
+
+    def backlog(self) -> float:
+        """Queued full-tier work per worker, in seconds"""
+        return self._backlog / self.workers
+
+    def submit(self, job: VideoJob, now: float):
+        cost = estimate_cost(job.duration)
+        # High priority jobs are always admitted; they get degraded instead of rejected
+        if (self.max_backlog is not None and job.priority > PRIORITY_HIGH
+                and (self._backlog + cost) / self.workers > self.max_backlog):
+            raise QueueFullError(f"Processing backlog is full ({self.backlog():.0f}s queued per worker)")
+
+        job.submitted_at = now
+        self._order[job.job_id] = self._sequence
+        self._sequence += 1
+        self._jobs.append(job)
+        self._backlog += cost
+
+    def _sort_key(self, job: VideoJob, now: float) -> Tuple:
+        aged_priority = max(job.priority - int((now - job.submitted_at) // AGING_INTERVAL), PRIORITY_HIGH)
+        deadline = job.deadline if job.deadline is not None else math.inf
+        return (aged_priority, deadline, estimate_cost(job.duration), self._order[job.job_id])
+
+    def pop(self, now: float) -> Optional[Tuple[VideoJob, str]]:
+        """Take the next job to run and the tier to run it with"""
+        if self._jobs:
+            job = min(self._jobs, key=lambda queued: self._sort_key(queued, now))
+            self._jobs.remove(job)
+            self._order.pop(job.job_id)
+            self._backlog -= estimate_cost(job.duration)
+            tier = self.select_tier(job, now)
+        elif self._upgrades:
+            # Regular queue is empty, so there is spare capacity for upgrades
+            job = self._upgrades.popleft()
+            tier = FULL_TIER
+        else:
+            return None
+
+        job.started_at = now
+        job.tier = tier
+        return job, tier
+
+    def select_tier(self, job: VideoJob, now: float) -> str:
+        level = 0
+        # High priority jobs are only degraded to meet their deadline
+        if job.priority > PRIORITY_HIGH:
+            backlog = self.backlog()
+            for index, tier in enumerate(MODEL_TIERS):
+                if backlog > LOAD_THRESHOLDS.get(tier['name'], math.inf):
+                    level = index
+
+        if job.deadline is not None:
+            while (level < len(MODEL_TIERS) - 1
+                   and now + estimate_cost(job.duration, MODEL_TIERS[level]['name']) > job.deadline):
+                level += 1
+
+        return MODEL_TIERS[level]['name']
+
+    def complete(self, job: VideoJob, now: float) -> Optional[VideoJob]:
+        """Record a finished job; returns the upgrade job queued for a degraded result"""
+        job.finished_at = now
+        if job.tier == FULL_TIER or job.upgrade_of is not None or not self.upgrades_enabled:
+            return None
+
+        upgrade = VideoJob(
+            duration=job.duration,
+            priority=job.priority,
+            payload=dict(job.payload),
+            upgrade_of=job.job_id,
+            submitted_at=now,
+        )
+        self._upgrades.append(upgrade)
+        return upgrade
+
+    def drop_excess_upgrades(self) -> List[VideoJob]:
+        """Drop the oldest upgrades beyond max_upgrades and return them"""
+        dropped = []
+        while len(self._upgrades) > self.max_upgrades:
+            dropped.append(self._upgrades.popleft())
+        return dropped
+
+class VideoScheduler:
+    """
+    Central job queue and result store for video processing.
+
+    Workers take jobs with next_job() and report them with finish_job();
+    run_video_worker() is that loop around process_func(job, tier), which does
+    the work and returns a result dict. start() runs the loop on background
+    threads of this process; the multi-worker server instead forks worker
+    processes that run it against a proxy (see server.py), so `workers` must be
+    the number of jobs that really run at once.
+
+    submit() returns the job id; job_status() returns the latest result of a job,
+    which is replaced by the full-tier result once an upgrade has run.
+    cleanup_func(job) is called once a job's payload is no longer needed: it
+    finished with no upgrade pending, it failed, or its upgrade was dropped.
+
+    With several server processes there must be only one VideoScheduler, so that
+    all uploads share one queue and results can be read from any process:
+    serve_scheduler() exposes it and connect_scheduler() returns a proxy.
+    """
+
+    def __init__(self, process_func: Callable[[VideoJob, str], Dict],
+                 workers: int = 1, max_backlog: Optional[float] = None,
+                 cleanup_func: Optional[Callable[[VideoJob], None]] = None,
+                 max_results: int = 500):
+        self.queue = JobQueue(workers=workers, max_backlog=max_backlog)
+        self.process_func = process_func
+        self.cleanup_func = cleanup_func
+        self.max_results = max_results
+        self._condition = threading.Condition()
+        self._results = OrderedDict()
+        self._running: Dict[str, Tuple[VideoJob, str, int]] = {}  # job id -> (job, tier, worker pid)
+        self._threads = []
+
+    def start(self):
+        """Run the workers as threads of this process"""
+        if self._threads:
+            return
+        for i in range(self.queue.workers):
+            thread = threading.Thread(target=run_video_worker, args=(self, self.process_func),
+                                      name=f"video-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"Video scheduler started with {self.queue.workers} workers")
+
+    def submit(self, job: VideoJob) -> str:
+        with self._condition:
+            self.queue.submit(job, time.time())
+            self._set_result(job.job_id, {'status': 'queued', 'job_id': job.job_id})
+            self._condition.notify()
+            backlog = self.queue.backlog()
+        logger.info(f"Queued job {job.job_id} ({job.duration:.0f}s video, priority {job.priority}, "
+                    f"backlog {backlog:.0f}s per worker)")
+        return job.job_id
+
+    def job_status(self, job_id: str) -> Optional[Dict]:
+        with self._condition:
+            return self._results.get(job_id)
+
+    def stats(self) -> Dict:
+        with self._condition:
+            return {
+                'queued': len(self.queue),
+                'running': len(self._running),
+                'pending_upgrades': self.queue.pending_upgrades,
+                'backlog_seconds': self.queue.backlog(),
+                'workers': self.queue.workers,
+            }
+
+    def next_job(self, worker_pid: int, timeout: Optional[float] = None) -> Optional[Tuple[VideoJob, str]]:
+        """
+        Take the next job and its tier, waiting up to timeout seconds for one.
+        worker_pid is the process that runs it, so its job can be failed if it dies.
+        """
+        deadline = time.time() + timeout if timeout is not None else None
+        with self._condition:
+            next_job = self.queue.pop(time.time())
+            while next_job is None:
+                remaining = deadline - time.time() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._condition.wait(remaining)
+                next_job = self.queue.pop(time.time())
+
+            job, tier = next_job
+            self._running[job.job_id] = (job, tier, worker_pid)
+            if job.upgrade_of is None:
+                self._set_result(job.job_id, {'status': 'running', 'job_id': job.job_id, 'tier': tier})
+
+        logger.info(f"Running job {job.job_id} on tier '{tier}' in worker {worker_pid}"
+                    + (f" (upgrade of {job.upgrade_of})" if job.upgrade_of else ""))
+        return job, tier
+
+    def finish_job(self, job_id: str, result: Optional[Dict] = None, error: Optional[str] = None):
+        """Record the result of a job taken with next_job(), or the error it failed with"""
+        with self._condition:
+            if job_id not in self._running:
+                return
+            job, tier, _ = self._running.pop(job_id)
+            result_id = job.upgrade_of or job.job_id
+            finished = []
+            if error is None:
+                upgrade = self.queue.complete(job, time.time())
+                self._set_result(result_id, dict(result, status='completed', tier=tier, job_id=result_id,
+                                                 upgrade_pending=upgrade is not None,
+                                                 queue_wait=job.started_at - job.submitted_at))
+                if upgrade is None:
+                    finished.append(job)
+                else:
+                    # An upgrade may be waiting for a worker blocked in next_job()
+                    self._condition.notify()
+                for dropped in self.queue.drop_excess_upgrades():
+                    self._mark_upgrade_dropped(dropped.upgrade_of)
+                    finished.append(dropped)
+            elif job.upgrade_of is not None:
+                # Keep serving the degraded result if the upgrade fails
+                self._mark_upgrade_dropped(result_id)
+                finished.append(job)
+            else:
+                self._set_result(result_id, {'status': 'failed', 'job_id': result_id, 'error': error})
+                finished.append(job)
+
+        if self.cleanup_func:
+            for finished_job in finished:
+                try:
+                    self.cleanup_func(finished_job)
+                except Exception as e:
+                    logger.error(f"Cleanup of job {finished_job.job_id} failed: {e}")
+
+    def fail_dead_workers(self):
+        """Fail the jobs of worker processes that exited without finishing them"""
+        with self._condition:
+            orphaned = [job_id for job_id, (_, _, pid) in self._running.items() if not _process_alive(pid)]
+        for job_id in orphaned:
+            logger.error(f"Worker running job {job_id} died")
+            self.finish_job(job_id, error="Video worker process died while processing the video")
+
+    def _set_result(self, job_id: str, result: Dict):
+        self._results[job_id] = result
+        self._results.move_to_end(job_id)
+        if len(self._results) <= self.max_results:
+            return
+        # Evict the oldest finished results; queued and running jobs are still being waited
+        # on, and a pending upgrade still has to write its result to the entry
+        for old_id in list(self._results):
+            if len(self._results) <= self.max_results:
+                break
+            old_result = self._results[old_id]
+            if old_result['status'] not in ('queued', 'running') and not old_result.get('upgrade_pending'):
+                del self._results[old_id]
+
+    def _mark_upgrade_dropped(self, job_id: str):
+        previous = self._results.get(job_id)
+        if previous is not None:
+            self._set_result(job_id, dict(previous, upgrade_pending=False))
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def run_video_worker(video_scheduler, process_func: Callable[[VideoJob, str], Dict],
+                     poll_timeout: float = 30):
+    """
+    Take jobs from video_scheduler (a VideoScheduler or a proxy to one) and run
+    them with process_func until the scheduler goes away
+    """
+    pid = os.getpid()
+    while True:
+        next_job = video_scheduler.next_job(pid, poll_timeout)
+        if next_job is None:
+            continue
+        job, tier = next_job
+        try:
+            result, error = process_func(job, tier), None
+        except Exception as e:
+            logger.error(f"Job {job.job_id} failed: {e}")
+            result, error = None, str(e)
+        video_scheduler.finish_job(job.job_id, result, error)
+
+class SchedulerManager(BaseManager):
+    pass
+
+def serve_scheduler(video_scheduler: VideoScheduler, address: str, authkey: bytes,
+                    reap_interval: float = 5):
+    """Serve video_scheduler to other processes on a unix socket; never returns"""
+    def reap():
+        while True:
+            time.sleep(reap_interval)
+            video_scheduler.fail_dead_workers()
+
+    threading.Thread(target=reap, name="video-worker-reaper", daemon=True).start()
+    SchedulerManager.register('get_scheduler', callable=lambda: video_scheduler,
+                              exposed=('submit', 'job_status', 'stats', 'next_job', 'finish_job'))
+    manager = SchedulerManager(address=address, authkey=authkey)
+    logger.info(f"Video scheduler listening on {address}")
+    manager.get_server().serve_forever()
+def connect_scheduler(address: str, authkey: bytes, timeout: float = 60):
+    """Proxy to the VideoScheduler served by serve_scheduler(), waiting for it to come up"""
+    SchedulerManager.register('get_scheduler')
+    deadline = time.time() + timeout
+    while True:
+        manager = SchedulerManager(address=address, authkey=authkey)
+        try:
+            manager.connect()
+            return manager.get_scheduler()
+        except (FileNotFoundError, ConnectionRefusedError):
+            if time.time() > deadline:
+                raise
+            time.sleep(0.5)
@@ -0,0 +1,260 @@
+"""
+Multi-worker server for the video summarizer API.
+
+The AI models (MiniLM, Whisper, BART) are loaded once in the parent process,
+then the parent forks the uvicorn workers. Model weights are never written
+during inference, so the forked workers keep sharing the parent's pages
+instead of each holding their own copy. With --share-memory the weights are
+additionally moved into shared memory tensors (needs a large enough /dev/shm).
+The course embedding cache is placed in shared memory as well, so an embedding
+computed by one worker is reused by all of them.
+
+One extra forked process holds the only VideoScheduler. The HTTP workers
+submit jobs to it and read results from it over a unix socket, so there is a
+single priority queue, backlog limit and result store no matter which worker
+accepted the upload or the /jobs poll. The transcription and summarization
+itself runs in --video-workers more forked processes (as many as --workers
+unless set), which share the preloaded Whisper/BART weights the same way and
+each take one job at a time from the scheduler.
+
+Usage:
+    python server.py --workers 8 --port 7860
+"""
+import argparse
+import gc
+import logging
+import os
+import signal
+import socket
+import sys
+import tempfile
+
+import uvicorn
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def _bind_socket(host: str, port: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+def _share_model_memory(models):
+    """Move model weights into shared memory tensors"""
+    for model in models:
+        model.share_memory()
+    logger.info(f"Moved {len(models)} models into shared memory")
+
+def _init_child(threads: int):
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+    try:
+        import torch
+        # Split the cores between processes instead of every process using all of them
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+
+def _run_scheduler(app_module, address: str, authkey: bytes, video_workers: int):
+    """Entry point of the forked scheduler process; never returns"""
+    from scheduler import serve_scheduler
+    # Only queues jobs and stores results, the video workers run them
+    _init_child(1)
+
+    exit_code = 0
+    try:
+        serve_scheduler(app_module.create_video_scheduler(video_workers), address, authkey)
+    except Exception as e:
+        logger.error(f"Scheduler {os.getpid()} crashed: {e}")
+        exit_code = 1
+    finally:
+        os._exit(exit_code)
+
+def _run_video_worker(app_module, address: str, authkey: bytes, threads: int):
+    """Entry point of a forked video worker process; never returns"""
+    from scheduler import connect_scheduler, run_video_worker
+    _init_child(threads)
+
+    exit_code = 0
+    try:
+        run_video_worker(connect_scheduler(address, authkey), app_module.run_video_job)
+    except Exception as e:
+        # Also reached when the scheduler goes away; the parent starts a new worker
+        logger.error(f"Video worker {os.getpid()} stopped: {e}")
+        exit_code = 1
+    finally:
+        os._exit(exit_code)
+
+def _run_worker(app, sock: socket.socket, threads: int):
+    """Entry point of a forked worker process; never returns"""
+    _init_child(threads)
+
+    exit_code = 0
+    try:
+        config = uvicorn.Config(app, log_level="info")
+        uvicorn.Server(config).run(sockets=[sock])
+    except Exception as e:
+        logger.error(f"Worker {os.getpid()} crashed: {e}")
+        exit_code = 1
+    finally:
+        os._exit(exit_code)
+
+def serve(host: str = "0.0.0.0", port: int = 10000, workers: int = 1, video_workers: int = 1,
+          share_memory: bool = False, cache_capacity: int = 8192):
+    """
+    Preload models, then fork `workers` uvicorn processes sharing one listening
+    socket, the video scheduler and `video_workers` video processing workers
+    """
+    import app as app_module
+    try:
+        import recommendation
+    except ImportError as e:
+        # Same as app.py: serve what still works and report the rest on /health
+        logger.error(f"Import error: {e}")
+        recommendation = None
+
+    try:
+        models = app_module.preload_models()
+    except Exception as e:
+        logger.error(f"Model preload failed, models load on first use instead: {e}")
+        models = []
+    if recommendation is not None and recommendation.MODEL_LOADED:
+        models.append(recommendation.model)
+        if workers > 1:
+            recommendation.enable_shared_embedding_cache(cache_capacity)
+
+    if share_memory:
+        _share_model_memory(models)
+
+    sock = _bind_socket(host, port)
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    video_threads = max(1, (os.cpu_count() or 1) // video_workers)
+
+    # Workers inherit these and connect to the scheduler process on startup
+    scheduler_address = os.path.join(tempfile.gettempdir(), f"video-scheduler-{os.getpid()}.sock")
+    scheduler_authkey = os.urandom(16)
+    os.environ['SCHEDULER_ADDRESS'] = scheduler_address
+    os.environ['SCHEDULER_AUTHKEY'] = scheduler_authkey.hex()
+
+    # Move everything allocated so far out of the garbage collector's reach, so
+    # collections in the workers don't touch (and copy) the parent's pages
+    gc.collect()
+    gc.freeze()
+
+    children = set()
+    video_worker_pids = set()
+    scheduler_pid = None
+    shutting_down = False
+
+    def spawn_scheduler():
+        nonlocal scheduler_pid
+        if os.path.exists(scheduler_address):
+            os.remove(scheduler_address)
+        pid = os.fork()
+        if pid == 0:
+            _run_scheduler(app_module, scheduler_address, scheduler_authkey, video_workers)
+        scheduler_pid = pid
+        children.add(pid)
+        logger.info(f"Started video scheduler {pid}")
+
+    def spawn_worker():
+        pid = os.fork()
+        if pid == 0:
+            _run_worker(app_module.app, sock, threads)
+        children.add(pid)
+        logger.info(f"Started worker {pid}")
+
+    def spawn_video_worker():
+        pid = os.fork()
+        if pid == 0:
+            _run_video_worker(app_module, scheduler_address, scheduler_authkey, video_threads)
+        children.add(pid)
+        video_worker_pids.add(pid)
+        logger.info(f"Started video worker {pid}")
+
+    def handle_shutdown(signum, frame):
+        nonlocal shutting_down
+        shutting_down = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                children.discard(pid)
+
+    signal.signal(signal.SIGINT, handle_shutdown)
+    signal.signal(signal.SIGTERM, handle_shutdown)
+
+    logger.info(f"Serving on http://{host}:{port} with {workers} workers ({threads} torch threads each) "
+                f"and {video_workers} video workers ({video_threads} torch threads each)")
+    spawn_scheduler()
+    for _ in range(workers):
+        spawn_worker()
+    for _ in range(video_workers):
+        spawn_video_worker()
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+
+        children.discard(pid)
+        if shutting_down:
+            continue
+
+        # Replacements are forked from the parent, so they share the preloaded models too
+        if pid == scheduler_pid:
+            # Queued jobs are lost with the scheduler; restart the workers too so none
+            # of them keeps a connection to the old one
+            logger.warning(f"Video scheduler {pid} exited with status {status}, restarting")
+            spawn_scheduler()
+            for worker_pid in children - {scheduler_pid}:
+                os.kill(worker_pid, signal.SIGTERM)
+        elif pid in video_worker_pids:
+            # The scheduler fails the job the worker was running
+            video_worker_pids.discard(pid)
+            logger.warning(f"Video worker {pid} exited with status {status}, restarting")
+            spawn_video_worker()
+        else:
+            logger.warning(f"Worker {pid} exited with status {status}, restarting")
+            spawn_worker()
+
+    sock.close()
+    if os.path.exists(scheduler_address):
+        os.remove(scheduler_address)
+    logger.info("Server stopped")
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the video summarizer API with preloaded, shared models")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", 10000)))
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("WORKERS", 1)),
+                        help="Number of worker processes (default: $WORKERS or 1)")
+    parser.add_argument("--video-workers", type=int,
+                        default=int(os.environ["VIDEO_WORKERS"]) if os.environ.get("VIDEO_WORKERS") else None,
+                        help="Number of video processing processes (default: $VIDEO_WORKERS or --workers)")
+    parser.add_argument("--share-memory", action="store_true",
+                        default=os.environ.get("SHARE_MODEL_MEMORY", "").lower() in ("1", "true", "yes"),
+                        help="Move model weights into shared memory tensors")
+    parser.add_argument("--cache-capacity", type=int, default=8192,
+                        help="Number of course embeddings the shared cache holds")
+    args = parser.parse_args()
+
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.video_workers is None:
+        # Scale video processing with the deployment, like the HTTP side
+        args.video_workers = args.workers
+    if args.video_workers < 1:
+        parser.error("--video-workers must be at least 1")
+
+    serve(args.host, args.port, args.workers, args.video_workers, args.share_memory, args.cache_capacity)
+
+if __name__ == "__main__":
+    sys.exit(main())
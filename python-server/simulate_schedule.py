@@ -0,0 +1,187 @@
+"""
+Replay an upload trace against the video scheduler and report queue wait and completion times.
+
+The trace is a CSV file with one upload per row:
+    arrival,duration,priority,deadline
+    0,95,1,
+    12,10800,2,
+    30,60,0,600
+arrival is seconds since the start of the trace, duration the video length in
+seconds, priority 0-2 (optional, default 1) and deadline seconds after arrival
+(optional). Without --trace a synthetic day with an upload spike is generated.
+
+Processing times come from the same cost estimates the scheduler uses, so the
+numbers compare policies rather than predict wall-clock time. The adaptive
+scheduler is compared with the previous behaviour: arrival order, full tier.
+
+Example:
+    python simulate_schedule.py --workers 4 --generate 200
+"""
+import argparse
+import csv
+import heapq
+import math
+import random
+from collections import Counter, deque
+from typing import Dict, List, Optional, Tuple
+
+from scheduler import (
+    JobQueue, VideoJob, QueueFullError, FULL_TIER, PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW,
+    estimate_cost
+)
+
+class FifoQueue:
+    """Baseline: every job in arrival order on the full tier, no admission limit"""
+
+    def __init__(self, workers: int = 1):
+        self.workers = workers
+        self._jobs = deque()
+
+    def submit(self, job: VideoJob, now: float):
+        job.submitted_at = now
+        self._jobs.append(job)
+
+    def pop(self, now: float) -> Optional[Tuple[VideoJob, str]]:
+        if not self._jobs:
+            return None
+        job = self._jobs.popleft()
+        job.started_at = now
+        job.tier = FULL_TIER
+        return job, FULL_TIER
+
+    def complete(self, job: VideoJob, now: float) -> Optional[VideoJob]:
+        job.finished_at = now
+        return None
+
+    def drop_excess_upgrades(self) -> List[VideoJob]:
+        return []
+
+def load_trace(path: str) -> List[Dict]:
+    uploads = []
+    with open(path, newline='') as f:
+        for row in csv.DictReader(f):
+            uploads.append({
+                'arrival': float(row['arrival']),
+                'duration': float(row['duration']),
+                'priority': int(row.get('priority') or PRIORITY_NORMAL),
+                'deadline': float(row['deadline']) if row.get('deadline') else None,
+            })
+    return sorted(uploads, key=lambda upload: upload['arrival'])
+
+def generate_trace(count: int, seed: int = 42) -> List[Dict]:
+    """Mostly short clips and lectures, some long recordings, a third of them arriving in one spike"""
+    rng = random.Random(seed)
+    uploads = []
+    for i in range(count):
+        if i < count // 3:
+            arrival = rng.uniform(3600, 5400)  # Upload spike in the second hour
+        else:
+            arrival = rng.uniform(0, 8 * 3600)
+
+        kind = rng.random()
+        if kind < 0.6:
+            duration = rng.uniform(30, 300)  # Intro clips
+        elif kind < 0.95:
+            duration = rng.uniform(600, 3600)  # Lectures
+        else:
+            duration = rng.uniform(7200, 10800)  # Full recordings
+
+        priority = rng.choices([PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW], weights=[1, 7, 2])[0]
+        deadline = 1800.0 if priority == PRIORITY_HIGH else None
+        uploads.append({'arrival': arrival, 'duration': duration, 'priority': priority, 'deadline': deadline})
+    return sorted(uploads, key=lambda upload: upload['arrival'])
+
+def simulate(uploads: List[Dict], queue, workers: int) -> Dict:
+    """Discrete-event replay of the trace through one scheduling policy"""
+    running = []  # Heap of (finish time, sequence, job)
+    sequence = 0
+    free_workers = workers
+    finished, upgraded, rejected = [], [], 0
+    index = 0
+    now = 0.0
+
+    while index < len(uploads) or running:
+        next_arrival = uploads[index]['arrival'] if index < len(uploads) else math.inf
+        next_finish = running[0][0] if running else math.inf
+
+        if next_arrival <= next_finish:
+            now = next_arrival
+            upload = uploads[index]
+            index += 1
+            job = VideoJob(
+                duration=upload['duration'],
+                priority=upload['priority'],
+                deadline=now + upload['deadline'] if upload['deadline'] is not None else None,
+            )
+            try:
+                queue.submit(job, now)
+            except QueueFullError:
+                rejected += 1
+        else:
+            now, _, job = heapq.heappop(running)
+            free_workers += 1
+            queue.complete(job, now)
+            queue.drop_excess_upgrades()
+            (upgraded if job.upgrade_of else finished).append(job)
+
+        while free_workers:
+            next_job = queue.pop(now)
+            if next_job is None:
+                break
+            job, tier = next_job
+            heapq.heappush(running, (now + estimate_cost(job.duration, tier), sequence, job))
+            sequence += 1
+            free_workers -= 1
+
+    return {'finished': finished, 'upgraded': upgraded, 'rejected': rejected, 'end': now}
+
+def _percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+def report(name: str, results: Dict):
+    finished = results['finished']
+    waits = [job.started_at - job.submitted_at for job in finished]
+    completions = [job.finished_at - job.submitted_at for job in finished]
+    short = [job.finished_at - job.submitted_at for job in finished if job.duration <= 300]
+    with_deadline = [job for job in finished if job.deadline is not None]
+    missed = sum(1 for job in with_deadline if job.finished_at > job.deadline)
+    tiers = Counter(job.tier for job in finished)
+
+    print(f"\n== {name} ==")
+    print(f"  jobs:                  {len(finished)} finished, {results['rejected']} rejected")
+    print(f"  queue wait:            mean {sum(waits) / max(len(waits), 1) / 60:7.1f} min   "
+          f"p95 {_percentile(waits, 0.95) / 60:7.1f} min")
+    print(f"  completion:            p50 {_percentile(completions, 0.5) / 60:7.1f} min   "
+          f"p95 {_percentile(completions, 0.95) / 60:7.1f} min")
+    print(f"  clips <= 5 min:        p95 completion {_percentile(short, 0.95) / 60:.1f} min")
+    print(f"  deadlines missed:      {missed}/{len(with_deadline)}")
+    print(f"  tiers:                 " + ", ".join(f"{tier} {count}" for tier, count in sorted(tiers.items())))
+    if results['upgraded']:
+        upgrade_delays = [job.finished_at - job.submitted_at for job in results['upgraded']]
+        print(f"  upgrades completed:    {len(results['upgraded'])} "
+              f"(p95 {_percentile(upgrade_delays, 0.95) / 60:.1f} min after the degraded result)")
+    print(f"  trace drained after:   {results['end'] / 3600:.1f} h")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--trace', help='CSV upload trace (arrival,duration,priority,deadline)')
+    parser.add_argument('--generate', type=int, default=200, help='Number of synthetic uploads when no trace is given')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--max-backlog', type=float, default=None,
+                        help='Reject non-urgent uploads above this many queued seconds per worker')
+    args = parser.parse_args()
+
+    uploads = load_trace(args.trace) if args.trace else generate_trace(args.generate, args.seed)
+    print(f"Replaying {len(uploads)} uploads "
+          f"({sum(upload['duration'] for upload in uploads) / 3600:.1f} h of video) on {args.workers} workers")
+
+    report('fifo, full tier', simulate(uploads, FifoQueue(args.workers), args.workers))
+    report('priority + adaptive tiers',
+           simulate(uploads, JobQueue(workers=args.workers, max_backlog=args.max_backlog), args.workers))
+
+if __name__ == '__main__':
+    main()
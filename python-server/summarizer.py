@@ -1,8 +1,28 @@
+import re
+import threading
+from collections import Counter
 from transformers import pipeline
 
+# Loaded summarization pipelines keyed by model name, so weights are read once per process
+# (and once per server when preloaded before forking workers)
+_summarizers = {}
+_load_lock = threading.Lock()
+# Pipelines aren't thread-safe, so calls on the same model are serialised
+_inference_locks = {}
+
+def get_summarizer(model_name: str = "facebook/bart-large-cnn"):
+    with _load_lock:
+        if model_name not in _summarizers:
+            summarizer = pipeline("summarization", model=model_name)
+            summarizer.model.eval()
+            summarizer.model.requires_grad_(False)
+            _inference_locks[model_name] = threading.Lock()
+            _summarizers[model_name] = summarizer
+        return _summarizers[model_name]
+
 def summarize_text(text: str, model_name: str = "facebook/bart-large-cnn", max_length: int = 300, min_length: int = 100) -> str:
     try:
-        summarizer = pipeline("summarization", model=model_name)
+        summarizer = get_summarizer(model_name)
         
         # If text is too short, return as is
         if len(text.split()) < 50:
@@ -13,16 +33,35 @@ def summarize_text(text: str, model_name: str = "facebook/bart-large-cnn", max_l
         adjusted_max_length = min(max_length, input_length // 2)
         adjusted_min_length = min(min_length, adjusted_max_length // 3)
         
-        summary = summarizer(
-            text, 
-            max_length=adjusted_max_length, 
-            min_length=adjusted_min_length, 
-            do_sample=False,
-            truncation=True
-        )
+        with _inference_locks[model_name]:
+            summary = summarizer(
+                text, 
+                max_length=adjusted_max_length, 
+                min_length=adjusted_min_length, 
+                do_sample=False,
+                truncation=True
+            )
         return summary[0]['summary_text']
     except Exception as e:
         print(f"Summarization error: {e}")
         # Fallback: return the first part of the text
         sentences = text.split('.')
-        return '. '.join(sentences[:3]) + '.'
\ No newline at end of file
+        return '. '.join(sentences[:3]) + '.'
+
+def extractive_summarize(text: str, num_sentences: int = 8) -> str:
+    """
+    Cheap summary without a model: picks the sentences whose words occur most
+    often in the text and returns them in their original order.
+    """
+    sentences = [s.strip() for s in re.split(r'(?<=[.!?])\s+', text) if s.strip()]
+    if len(sentences) <= num_sentences:
+        return text
+
+    word_counts = Counter(word for word in re.findall(r'[a-z]+', text.lower()) if len(word) > 3)
+
+    def score(sentence):
+        words = [word for word in re.findall(r'[a-z]+', sentence.lower()) if len(word) > 3]
+        return sum(word_counts[word] for word in words) / (len(words) or 1)
+
+    top = sorted(range(len(sentences)), key=lambda i: score(sentences[i]), reverse=True)[:num_sentences]
+    return ' '.join(sentences[i] for i in sorted(top))
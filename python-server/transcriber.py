@@ -1,7 +1,16 @@
 import subprocess
+import threading
 import whisper
 import os
 
+# Loaded Whisper models keyed by size, so weights are read once per process
+# (and once per server when preloaded before forking workers)
+_whisper_models = {}
+_load_lock = threading.Lock()
+# Whisper installs per-call hooks on the model, so one model can't transcribe on
+# two threads at once; calls on the same model size are serialised
+_inference_locks = {}
+
 def extract_audio(video_path: str, audio_path: str = "temp_audio.wav") -> str:
     if os.path.exists(audio_path):
         os.remove(audio_path)
@@ -10,8 +19,26 @@ def extract_audio(video_path: str, audio_path: str = "temp_audio.wav") -> str:
     subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
     return audio_path
 
+def probe_duration(video_path: str) -> float:
+    """Duration of a video in seconds, read from the container without decoding it"""
+    command = ["ffprobe", "-v", "error", "-show_entries", "format=duration",
+               "-of", "default=noprint_wrappers=1:nokey=1", video_path]
+    result = subprocess.run(command, capture_output=True, text=True, check=True)
+    return float(result.stdout.strip())
+
+def get_whisper_model(model_size: str = "base"):
+    with _load_lock:
+        if model_size not in _whisper_models:
+            model = whisper.load_model(model_size)
+            model.eval()
+            model.requires_grad_(False)
+            _inference_locks[model_size] = threading.Lock()
+            _whisper_models[model_size] = model
+        return _whisper_models[model_size]
+
 def transcribe_audio(audio_path: str, model_size: str = "base") -> str:
-    model = whisper.load_model(model_size)
-    result = model.transcribe(audio_path)
+    model = get_whisper_model(model_size)
+    with _inference_locks[model_size]:
+        result = model.transcribe(audio_path)
     transcript = result["text"]
-    return transcript
\ No newline at end of file
+    return transcript